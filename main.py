@@ -12,18 +12,40 @@ Author's Notes:
 
 from fastapi import FastAPI, HTTPException, Query, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 import yfinance as yf
+import httpx
 import pandas as pd
-import json
+import numpy as np
+import orjson
+import msgpack
 import os
-from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+import mmap
+import math
+import numbers
+import re
+import shutil
+import tempfile
+from datetime import datetime, date, timedelta
+from typing import Optional, List, Dict, Any, Tuple
 from pathlib import Path
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import logging
+import threading
+from operator import itemgetter
+
+try:
+    from numba import njit, prange
+except ImportError:  # Scoring still works without numba, just at Python speed
+    prange = range
+
+    def njit(*args, **kwargs):
+        return lambda func: func
 
 # ============================================================================
 # CONFIGURATION
@@ -47,15 +69,105 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Stock lists are repetitive JSON (dividendHistory especially) - compresses ~7-10x
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Paths for data persistence
 DATA_DIR = Path(__file__).parent / "data"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
-HISTORICAL_FILE = DATA_DIR / "historical_dividends.json"
+HISTORICAL_FILE = DATA_DIR / "historical_dividends.json"  # Legacy single-file history
+HISTORY_DIR = DATA_DIR / "history"  # One msgpack file of trend points per ticker
 SNAPSHOT_FILE = DATA_DIR / "latest_snapshot.json"
 
-# Thread pool for parallel yfinance calls (yfinance is blocking)
+# Tickers become file names, so only allow symbol characters
+TICKER_PATTERN = re.compile(r"[A-Z0-9.\-^=]{1,12}")
+
+# Optional Redis cache - set REDIS_URL to keep snapshots in Redis instead of
+# the JSON files above. Per-ticker keys mean a refresh never rewrites the world.
+REDIS_URL = os.environ.get("REDIS_URL")
+HISTORY_LIMIT = 30  # Trend points kept per ticker
+HISTORY_COMPACT_BYTES = 8 * 1024  # Trim a ticker's on-disk trend log past this size
+REDIS_TIMEOUT = 5  # seconds - a stalled Redis fails the call instead of hanging it
+
+redis_client = None
+if REDIS_URL:
+    import redis
+    redis_client = redis.Redis.from_url(
+        REDIS_URL,
+        decode_responses=True,
+        socket_timeout=REDIS_TIMEOUT,
+        socket_connect_timeout=REDIS_TIMEOUT
+    )
+
+# Thread pool for yfinance .info calls (yfinance is blocking)
 executor = ThreadPoolExecutor(max_workers=10)
 
+# Snapshot/history/info-cache reads and writes (Redis or disk) are blocking too.
+# They get their own threads so they never queue behind a refresh's yfinance calls.
+storage_executor = ThreadPoolExecutor(max_workers=4)
+
+# Worker processes for the CPU-bound metrics pass - threads would just queue
+# on the GIL and stall the event loop. Created on first use.
+COMPUTE_WORKERS = min(4, os.cpu_count() or 1)
+compute_pool: Optional[ProcessPoolExecutor] = None
+
+# Dividend history comes straight from Yahoo's chart endpoint over one shared
+# HTTP/2 client - keep-alive + multiplexing instead of a handshake per ticker
+YAHOO_CHART_URL = "https://query2.finance.yahoo.com/v8/finance/chart/{symbol}"
+YAHOO_HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; DividendHunter/1.0)"}
+CHART_CONCURRENCY = 8  # Max chart requests in flight at once
+http_client: Optional[httpx.AsyncClient] = None
+chart_semaphore = asyncio.Semaphore(CHART_CONCURRENCY)
+
+# Info fields we use, grouped by how fast they change: name -> (fields, TTL seconds).
+# Each tier is cached on its own, in Redis hashes ({tier}:{ticker}) when
+# REDIS_URL is set, otherwise in-process. .info is one call for all tiers, so a
+# ticker only skips yfinance while every tier - dyn included - is fresh. With a
+# 1h dyn TTL and weekly refreshes, that means back-to-back refreshes (or a
+# refresh right after someone viewed the stock), not the normal refresh cycle.
+INFO_TIERS = {
+    "static": (["shortName", "sector", "industry"], 7 * 24 * 60 * 60),
+    "semi": ([
+        "marketCap", "trailingPE", "fiftyTwoWeekHigh", "fiftyTwoWeekLow",
+        "payoutRatio", "dividendRate", "exDividendDate"
+    ], 24 * 60 * 60),
+    "dyn": (["currentPrice", "regularMarketPrice", "dividendYield"], 60 * 60),
+}
+info_cache: Dict[str, Dict[str, Tuple[float, Dict[str, Any]]]] = {}  # ticker -> tier -> (expires_at, fields)
+info_cache_lock = threading.Lock()  # Loads/stores run on several storage threads
+
+# Parsed snapshot (with frame + indexes) reused until the data underneath changes.
+# version is (mtime_ns, size) of the snapshot file, or stocks:fetchedAt on Redis
+snapshot_cache: Dict[str, Any] = {"version": None, "data": None}
+
+# Tickers fetched together per batch - their info and dividend requests run
+# concurrently, and the 2s pause between batches keeps Yahoo happy
+BATCH_SIZE = 20
+
+# In-flight /api/stock fetches keyed by ticker - concurrent requests for the
+# same ticker await one shared fetch instead of each hitting yfinance
+inflight_details: Dict[str, asyncio.Future] = {}
+detail_stats = {"cached_dedupe": 0}  # Requests served by someone else's fetch
+
+# /api/stock micro-batching - tickers requested within this window of the
+# first one go out together as one batched fetch (up to BATCH_SIZE)
+DETAIL_BATCH_WAIT = 0.05  # seconds
+detail_queue: Optional[asyncio.Queue] = None
+detail_flusher: Optional[asyncio.Task] = None
+detail_batches = set()  # Strong refs so running flush tasks aren't GC'd
+
+# Fields the list endpoints can sort by - each gets a precomputed order.
+# Text fields sort A-Z, everything else high-to-low.
+SORTABLE_FIELDS = [
+    "rankScore", "dividendYield", "annualDividend", "payoutRatio", "growthRate",
+    "safetyScore", "consecutiveYears", "price", "marketCap", "peRatio",
+    "fiftyTwoWeekHigh", "fiftyTwoWeekLow", "ticker", "name"
+]
+TEXT_SORT_FIELDS = ["ticker", "name"]
+
+# One C-level key getter per sortable field, built once at import
+_SORTERS = {field: itemgetter(field) for field in SORTABLE_FIELDS}
+
 
 # ============================================================================
 # S&P 500 CONSTITUENTS - Real current list
@@ -115,23 +227,329 @@ SP500_TICKERS = [
 # DIVIDEND DATA MODELS
 # ============================================================================
 
-def calculate_dividend_metrics(ticker: str) -> Optional[Dict[str, Any]]:
+def get_http_client() -> httpx.AsyncClient:
+    """The shared Yahoo client, created on first use."""
+    global http_client
+    if http_client is None or http_client.is_closed:
+        http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+            headers=YAHOO_HEADERS,
+            timeout=15.0
+        )
+    return http_client
+
+
+async def close_http_client():
+    """Closes the shared client (app shutdown / end of a script)."""
+    if http_client is not None:
+        await http_client.aclose()
+
+
+def get_compute_pool() -> ProcessPoolExecutor:
+    """The shared metrics worker pool, created on first use."""
+    global compute_pool
+    if compute_pool is None:
+        compute_pool = ProcessPoolExecutor(max_workers=COMPUTE_WORKERS)
+    return compute_pool
+
+
+def close_compute_pool():
+    """Stops the worker processes (app shutdown / end of a script)."""
+    global compute_pool
+    if compute_pool is not None:
+        compute_pool.shutdown()
+        compute_pool = None
+
+
+def discard_compute_pool(pool: ProcessPoolExecutor):
+    """Drops a broken pool so the next get_compute_pool() starts fresh workers."""
+    global compute_pool
+    if compute_pool is pool:
+        compute_pool = None
+    pool.shutdown(wait=False)
+
+
+async def fetch_batch(tickers: List[str], use_cache: bool = True) -> Dict[str, Tuple[Dict[str, Any], pd.Series]]:
+    """
+    Fetches info and dividend history for a batch of tickers in one go.
+    Info goes through yfinance across the executor threads while the dividend
+    histories are pulled concurrently over the shared HTTP/2 client.
+    use_cache=False skips the info tier cache (see fetch_info_batch).
+
+    Returns {ticker: (info, dividends)} for every ticker that could be fetched.
+    """
+    client = get_http_client()
+    
+    info_future = asyncio.ensure_future(fetch_info_batch(tickers, use_cache))
+    histories = await asyncio.gather(
+        *(fetch_dividend_history(client, ticker) for ticker in tickers),
+        return_exceptions=True
+    )
+    infos = await info_future
+
+    raw = {}
+    for ticker, dividends in zip(tickers, histories):
+        if isinstance(dividends, Exception):
+            logger.warning(f"Failed to fetch dividends for {ticker}: {dividends}")
+            continue
+        if ticker in infos:
+            raw[ticker] = (infos[ticker], dividends)
+    return raw
+
+
+async def fetch_info_batch(tickers: List[str], use_cache: bool = True) -> Dict[str, Dict[str, Any]]:
     """
-    Fetches comprehensive dividend data for a single ticker.
-    This is where the magic happens - we pull everything dividend-related.
+    Quote/profile info for a batch.
+    Tickers with every tier still cached are served from the cache; the rest
+    are fetched through yfinance (it handles Yahoo's cookie/crumb), one
+    blocking .info call per ticker, spread across the executor threads.
     
-    Returns None if the stock doesn't pay dividends or data fetch fails.
+    With use_cache=False everything is fetched fresh (the result still
+    refreshes the cache for later callers).
     """
+    loop = asyncio.get_running_loop()
+    if use_cache:
+        cached = await loop.run_in_executor(storage_executor, load_info_tiers, tickers)
+    else:
+        cached = {ticker: {} for ticker in tickers}
+    stale = [ticker for ticker in tickers if len(cached[ticker]) < len(INFO_TIERS)]
+    
+    fresh = {}
+    if stale:
+        infos = await asyncio.gather(
+            *(loop.run_in_executor(executor, fetch_info, ticker) for ticker in stale)
+        )
+        fresh = {ticker: info for ticker, info in zip(stale, infos) if info is not None}
+        await loop.run_in_executor(storage_executor, store_info_tiers, fresh)
+    
+    infos = {}
+    for ticker in tickers:
+        merged = {}
+        for fields in cached[ticker].values():
+            merged.update(fields)
+        if ticker in fresh:
+            # Fresh data wins; cached tiers fill in anything Yahoo left out this time
+            merged.update(fresh[ticker])
+        elif ticker in stale:
+            continue
+        infos[ticker] = merged
+    return infos
+
+
+def fetch_info(ticker: str) -> Optional[Dict[str, Any]]:
+    """yfinance info for one ticker, or None if Yahoo wouldn't give it to us. Blocking."""
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        return yf.Ticker(ticker).info
+    except Exception as e:
+        logger.warning(f"Failed to fetch data for {ticker}: {e}")
+        return None
+
+
+def load_info_tiers(tickers: List[str]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Still-valid cached info tiers: {ticker: {tier: fields}}."""
+    cached = {ticker: {} for ticker in tickers}
+    
+    if redis_client is not None:
+        # Every tier of every ticker in one round trip; expired hashes come back empty
+        pipe = redis_client.pipeline(transaction=False)
+        for ticker in tickers:
+            for tier in INFO_TIERS:
+                pipe.hgetall(f"{tier}:{ticker}")
+        try:
+            replies = iter(pipe.execute())
+        except redis.RedisError as e:
+            logger.warning(f"Info cache unavailable, fetching everything: {e}")
+            return cached
         
-        # Get historical dividends for trend analysis
-        # We want at least 5 years of data for meaningful trends
-        dividends = stock.dividends
+        for ticker in tickers:
+            for tier in INFO_TIERS:
+                fields = next(replies)
+                if fields:
+                    cached[ticker][tier] = {k: orjson.loads(v) for k, v in fields.items()}
+        return cached
+    
+    now = time.time()
+    with info_cache_lock:
+        prune_info_cache(now)
+        for ticker in tickers:
+            cached[ticker].update(
+                (tier, fields) for tier, (_, fields) in info_cache.get(ticker, {}).items()
+            )
+    return cached
+
+
+def prune_info_cache(now: float):
+    """
+    Drops expired tiers, and tickers left with none, from the in-process cache -
+    otherwise every symbol ever looked up via /api/stock stays in memory.
+    Caller holds info_cache_lock.
+    """
+    for ticker in list(info_cache):
+        tiers = info_cache[ticker]
+        for tier in [tier for tier, (expires_at, _) in tiers.items() if expires_at <= now]:
+            del tiers[tier]
+        if not tiers:
+            del info_cache[ticker]
+
+
+def store_info_tiers(infos: Dict[str, Dict[str, Any]]):
+    """Caches each tier of freshly fetched info with that tier's TTL."""
+    pipe = redis_client.pipeline(transaction=False) if redis_client is not None else None
+    now = time.time()
+    
+    for ticker, info in infos.items():
+        for tier, (fields, ttl) in INFO_TIERS.items():
+            values = {field: info[field] for field in fields if field in info}
+            if not values:
+                continue  # Don't let a sparse response wipe a good cached tier
+            
+            if pipe is not None:
+                key = f"{tier}:{ticker}"
+                pipe.delete(key)
+                pipe.hset(key, mapping={k: orjson.dumps(v) for k, v in values.items()})
+                pipe.expire(key, ttl)
+            else:
+                with info_cache_lock:
+                    info_cache.setdefault(ticker, {})[tier] = (now + ttl, values)
+    
+    if pipe is None:
+        with info_cache_lock:
+            prune_info_cache(now)
+    else:
+        try:
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Failed to cache info tiers: {e}")
+
+
+async def fetch_dividend_history(client: httpx.AsyncClient, symbol: str) -> pd.Series:
+    """
+    Full dividend history for one symbol from the chart endpoint's dividend events.
+    Monthly bars keep the payload small - the events come through regardless.
+    Dates are in exchange-local time, matching what yfinance reports.
+    """
+    async with chart_semaphore:
+        response = await client.get(
+            YAHOO_CHART_URL.format(symbol=symbol),
+            params={"range": "max", "interval": "1mo", "events": "div"}
+        )
+    response.raise_for_status()
+    
+    result = response.json()["chart"]["result"][0]
+    events = (result.get("events") or {}).get("dividends") or {}
+    if not events:
+        return pd.Series(dtype=float)
+    
+    offset = result.get("meta", {}).get("gmtoffset") or 0
+    dates = pd.to_datetime([event["date"] + offset for event in events.values()], unit="s").normalize()
+    dividends = pd.Series([event["amount"] for event in events.values()], index=dates, dtype=float).sort_index()
+    return dividends[dividends > 0]
+
+
+async def calculate_batch_metrics(tickers: List[str], use_cache: bool = True) -> List[Dict[str, Any]]:
+    """
+    Fetch + compute for a batch of tickers.
+    Only dividend payers with usable data make it into the result.
+    use_cache=False bypasses the info tier cache - for views that need live numbers.
+    """
+    try:
+        raw = await fetch_batch(tickers, use_cache)
+    except Exception as e:
+        logger.warning(f"Batch fetch failed for {tickers}: {e}")
+        return []
+
+    # Pure compute - run it in a worker process, off the event loop
+    loop = asyncio.get_running_loop()
+    for _ in range(2):
+        pool = get_compute_pool()
+        try:
+            return await loop.run_in_executor(pool, compute_batch_metrics, raw)
+        except BrokenProcessPool as e:
+            # A worker died (OOM, kill) - the pool is unusable from here on.
+            # Swap in fresh workers and give this batch one more go.
+            logger.warning(f"Compute pool broke, restarting it: {e}")
+            discard_compute_pool(pool)
+        except Exception as e:
+            logger.warning(f"Batch compute failed for {tickers}: {e}")
+            return []
+    
+    logger.warning(f"Batch compute failed for {tickers}: workers keep crashing")
+    return []
+
+
+def compute_batch_metrics(raw: Dict[str, Tuple[Dict[str, Any], pd.Series]]) -> List[Dict[str, Any]]:
+    """
+    Turns a fetched batch into dividend metrics.
+    The history-derived stats (growth, track record, frequency) are computed
+    for every ticker at once over a single stacked frame, not per ticker.
+    """
+    all_div = build_dividend_frame({
+        ticker: dividends for ticker, (info, dividends) in raw.items()
+    })
+    growth, consecutive, frequency = derive_history_stats(all_div)
+    fetched_at = datetime.now().isoformat()  # One stamp for the whole batch
+
+    results = []
+    score_inputs = []
+    for ticker, (info, dividends) in raw.items():
         if dividends.empty:
-            return None
-        
+            continue
+        computed = compute_metrics(
+            ticker, info, dividends,
+            growth_rate=float(growth[ticker]),
+            consecutive_years=int(consecutive[ticker]),
+            frequency=frequency[ticker],
+            fetched_at=fetched_at
+        )
+        if computed is not None:
+            results.append(computed[0])
+            score_inputs.append(computed[1])
+    
+    if results:
+        score_stocks(results, score_inputs)
+    return results
+
+
+def score_stocks(stocks: List[Dict[str, Any]], score_inputs: List[Tuple[float, int, float, float]]):
+    """
+    Fills in safetyScore, rankScore and category for a batch in one kernel call.
+    score_inputs holds the unrounded (payout %, consecutive years, growth %, yield %)
+    for each stock - rounding first would shift stocks across score thresholds.
+    """
+    payout, years, growth, dividend_yield = (
+        np.array(column, dtype=np.float64) for column in zip(*score_inputs)
+    )
+    safety = np.empty(len(stocks), dtype=np.int64)
+    rank = np.empty(len(stocks), dtype=np.float64)
+    score_kernel(payout, years, growth, dividend_yield, safety, rank)
+    
+    for i, stock in enumerate(stocks):
+        stock["safetyScore"] = int(safety[i])
+        stock["rankScore"] = round(float(rank[i]), 2)
+        stock["category"] = categorize_stock(
+            dividend_yield[i], growth[i], int(safety[i]), int(years[i])
+        )
+
+
+def compute_metrics(
+    ticker: str,
+    info: Dict[str, Any],
+    dividends: pd.Series,
+    growth_rate: float,
+    consecutive_years: int,
+    frequency: str,
+    fetched_at: str
+) -> Optional[Tuple[Dict[str, Any], Tuple[float, int, float, float]]]:
+    """
+    Turns raw yfinance data into our dividend metrics.
+    This is where the magic happens - pure compute, no network.
+    History stats (and the fetchedAt stamp) come precomputed from the batch pass.
+    
+    Returns (record, score_input) - see score_stocks() - or None if the stock
+    doesn't pay dividends or the data is unusable.
+    """
+    try:
         # Get dividend yield with smart detection
         # CRITICAL FIX: yfinance is inconsistent with dividendYield format
         # Sometimes it returns decimal (0.05 = 5%), sometimes percentage (5.0 = 5%)
@@ -159,48 +577,27 @@ def calculate_dividend_metrics(ticker: str) -> Optional[Dict[str, Any]]:
         annual_dividend = info.get("dividendRate", 0) or 0
         
         # Convert to list of {date, amount} for storage
+        recent = dividends.tail(400)  # Last ~10 years (400 quarters)
         dividend_history = [
-            {"date": str(date.date()), "amount": float(amount)}
-            for date, amount in dividends.tail(400).items()  # Last ~10 years (400 quarters)
+            {"date": day, "amount": amount}
+            for day, amount in zip(recent.index.strftime("%Y-%m-%d"), recent.astype(float).tolist())
         ]
         
-        # Calculate dividend growth rate (CAGR over available history)
-        growth_rate = calculate_dividend_growth(dividends)
-        
         # Calculate payout ratio and safety metrics
         payout_ratio = info.get("payoutRatio", 0) or 0
         
-        # Determine consecutive years of dividend payments
-        consecutive_years = calculate_consecutive_years(dividends)
-        
         # Ex-dividend date
         ex_dividend_date = info.get("exDividendDate")
         if ex_dividend_date:
-            ex_dividend_date = datetime.fromtimestamp(ex_dividend_date).strftime("%Y-%m-%d")
+            ex_dividend_date = date.fromtimestamp(ex_dividend_date).isoformat()
         
-        # Payment frequency (quarterly, monthly, etc.)
-        frequency = determine_payment_frequency(dividends)
-        
-        # Safety score (0-100) based on multiple factors
+        # Safety/rank scores are computed for the whole batch in score_stocks()
         # NOTE: yfinance returns payout_ratio as decimal (e.g., 0.50 = 50%)
-        # Convert to percentage for calculate_safety_score()
+        # Convert to percentage for the scoring kernel
         payout_ratio_pct = payout_ratio * 100 if payout_ratio else 0
-        safety_score = calculate_safety_score(
-            payout_ratio=payout_ratio_pct,
-            consecutive_years=consecutive_years,
-            growth_rate=growth_rate,
-            dividend_yield=dividend_yield_pct
-        )
+        score_input = (payout_ratio_pct, consecutive_years, growth_rate, dividend_yield_pct)
         
-        # Composite ranking score for auto-sorting
-        rank_score = calculate_rank_score(
-            dividend_yield=dividend_yield_pct,
-            growth_rate=growth_rate,
-            safety_score=safety_score,
-            consecutive_years=consecutive_years
-        )
-        
-        return {
+        record = {
             "ticker": ticker,
             "name": info.get("shortName", ticker),
             "sector": info.get("sector", "Unknown"),
@@ -213,208 +610,230 @@ def calculate_dividend_metrics(ticker: str) -> Optional[Dict[str, Any]]:
             "paymentFrequency": frequency,
             "consecutiveYears": consecutive_years,
             "growthRate": round(growth_rate, 2),  # Already percentage
-            "safetyScore": safety_score,
-            "rankScore": round(rank_score, 2),
+            "safetyScore": None,  # Filled in by score_stocks()
+            "rankScore": None,
             "dividendHistory": dividend_history,
             "fiftyTwoWeekHigh": info.get("fiftyTwoWeekHigh", 0),
             "fiftyTwoWeekLow": info.get("fiftyTwoWeekLow", 0),
             "marketCap": info.get("marketCap", 0),
             "peRatio": info.get("trailingPE", 0),
-            "category": categorize_stock(dividend_yield_pct, growth_rate, safety_score, consecutive_years),
-            "fetchedAt": datetime.now().isoformat()
+            "category": None,
+            "fetchedAt": fetched_at
         }
+        return record, score_input
         
     except Exception as e:
-        logger.warning(f"Failed to fetch data for {ticker}: {e}")
+        logger.warning(f"Failed to compute metrics for {ticker}: {e}")
         return None
 
 
-def calculate_dividend_growth(dividends: pd.Series) -> float:
+def build_dividend_frame(dividends_by_ticker: Dict[str, pd.Series]) -> pd.DataFrame:
     """
-    Calculates the compound annual growth rate (CAGR) of dividends.
-    Uses 5-year lookback if available, otherwise uses all available data.
-    
-    A positive growth rate means dividends are increasing - that's what we want.
+    Stacks every ticker's dividend series into one long frame with
+    columns ticker, date, amount - the input for the batch calculations below.
+    Rows are grouped by ticker and in date order within each ticker.
     """
-    if len(dividends) < 4:  # Need at least a year of quarterly payments
-        return 0.0
+    series = {}
+    for ticker, dividends in dividends_by_ticker.items():
+        if dividends.empty:
+            continue
+        # Mixed timezones can't be stacked - keep the local wall-clock dates
+        if getattr(dividends.index, "tz", None) is not None:
+            dividends = dividends.tz_localize(None)
+        series[ticker] = dividends.sort_index().astype(float)
     
-    # Group by year and sum
-    dividends_by_year = dividends.groupby(dividends.index.year).sum()
+    if not series:
+        return pd.DataFrame({
+            "ticker": pd.Series(dtype=object),
+            "date": pd.Series(dtype="datetime64[ns]"),
+            "amount": pd.Series(dtype=float)
+        })
     
-    if len(dividends_by_year) < 2:
-        return 0.0
+    all_div = pd.concat(series, names=["ticker", "date"]).rename("amount").reset_index()
+    all_div["date"] = pd.to_datetime(all_div["date"])
+    return all_div
+
+
+def yearly_dividends(all_div: pd.DataFrame) -> pd.DataFrame:
+    """Dividends summed per ticker per year (long form, years ascending)."""
+    return (
+        all_div.groupby(["ticker", all_div["date"].dt.year.rename("year")])["amount"]
+        .sum()
+        .reset_index()
+    )
+
+
+def derive_history_stats(all_div: pd.DataFrame) -> Tuple[pd.Series, pd.Series, pd.Series]:
+    """
+    Growth rate, consecutive years and payment frequency per ticker, from
+    one set of intermediates: the yearly sums and payment counts are built
+    once and shared instead of each calculation regrouping the raw rows.
+    """
+    yearly = yearly_dividends(all_div)
+    payments = all_div.groupby("ticker").size()
+    return (
+        calculate_dividend_growth(yearly, payments),
+        calculate_consecutive_years(yearly),
+        determine_payment_frequency(all_div)
+    )
+
+
+def calculate_dividend_growth(yearly: pd.DataFrame, payments: pd.Series) -> pd.Series:
+    """
+    Calculates the compound annual growth rate (CAGR) of dividends, per ticker.
+    Uses 5-year lookback if available, otherwise uses all available data.
+    Takes the yearly sums and per-ticker payment counts from derive_history_stats().
     
+    A positive growth rate means dividends are increasing - that's what we want.
+    """
     # CRITICAL FIX: Exclude current year if it's incomplete
     # Comparing a full previous year to a partial current year destroys growth rate
-    current_year = datetime.now().year
-    if current_year in dividends_by_year.index:
-        dividends_by_year = dividends_by_year.drop(current_year)
-        
-    if len(dividends_by_year) < 2:
-        return 0.0
-
-    # Take last 5 years max
-    recent_years = dividends_by_year.tail(5)
+    yearly = yearly[yearly["year"] != datetime.now().year]
     
-    start_value = recent_years.iloc[0]
-    end_value = recent_years.iloc[-1]
-    years = len(recent_years) - 1
+    # Take last 5 years max
+    recent = yearly.groupby("ticker").tail(5).groupby("ticker")
+    start_value = recent["amount"].first()
+    end_value = recent["amount"].last()
     
-    if start_value <= 0 or years <= 0:
-        return 0.0
+    # Compounding periods are calendar years between the endpoints, not
+    # rows - a year with no payments in between still counts
+    years = recent["year"].last() - recent["year"].first()
     
-    # CAGR formula: (end/start)^(1/years) - 1
-    cagr = ((end_value / start_value) ** (1 / years) - 1) * 100
+    # CAGR formula: exp(ln(end/start) / years) - 1, same as (end/start)^(1/years) - 1
+    # but expm1 keeps small rates accurate
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cagr = np.expm1(np.log(end_value / start_value) / years) * 100
     
-    return cagr
+    # Need at least a year of quarterly payments and two full years to compare
+    valid = (start_value > 0) & (years > 0) & (payments.reindex(cagr.index) >= 4)
+    return pd.Series(
+        np.where(valid, cagr, 0.0), index=cagr.index
+    ).reindex(payments.index, fill_value=0.0)
 
 
-def calculate_consecutive_years(dividends: pd.Series) -> int:
+def calculate_consecutive_years(yearly: pd.DataFrame) -> pd.Series:
     """
-    Counts consecutive years of dividend payments.
+    Counts consecutive years of dividend payments, per ticker, from the yearly sums.
     Dividend aristocrats have 25+ years, kings have 50+.
     
     This is a simplified check - production would verify no cuts occurred.
     """
-    if dividends.empty:
-        return 0
-    
-    years_with_dividends = dividends.groupby(dividends.index.year).sum()
-    years_list = sorted(years_with_dividends.index, reverse=True)
+    yearly = yearly.sort_values(["ticker", "year"], ascending=[True, False])
+    by_ticker = yearly.groupby("ticker")["year"]
     
-    consecutive = 0
-    for i, year in enumerate(years_list):
-        if i == 0:
-            consecutive = 1
-        elif years_list[i-1] - year == 1:
-            consecutive += 1
-        else:
-            break
-    
-    return consecutive
+    # Walking back from the latest year, the streak holds while the i-th
+    # year is exactly i years before the latest - the first gap breaks it
+    in_streak = (by_ticker.transform("max") - yearly["year"]) == by_ticker.cumcount()
+    return in_streak.groupby(yearly["ticker"]).sum().astype(int)
 
 
-def determine_payment_frequency(dividends: pd.Series) -> str:
+def determine_payment_frequency(all_div: pd.DataFrame) -> pd.Series:
     """
-    Figures out how often dividends are paid.
+    Figures out how often dividends are paid, per ticker.
     Most S&P 500 companies pay quarterly, but some pay monthly or semi-annually.
     """
-    if len(dividends) < 2:
-        return "Unknown"
-    
-    # Calculate average days between payments
-    dates = dividends.index.sort_values()
-    if len(dates) < 2:
-        return "Unknown"
+    # Calculate average days between payments. Rows are already in
+    # ticker/date order, so one diff down the whole column gives every gap -
+    # just blank out each ticker's first row (its diff spans two tickers)
+    same_ticker = all_div["ticker"].eq(all_div["ticker"].shift())
+    gaps = all_div["date"].diff().dt.days.where(same_ticker)
+    avg_diff = gaps.groupby(all_div["ticker"]).mean()
     
-    diffs = [(dates[i+1] - dates[i]).days for i in range(len(dates)-1)]
-    avg_diff = sum(diffs) / len(diffs)
-    
-    if avg_diff < 45:
-        return "Monthly"
-    elif avg_diff < 100:
-        return "Quarterly"
-    elif avg_diff < 200:
-        return "Semi-Annual"
-    else:
-        return "Annual"
+    frequency = pd.cut(
+        avg_diff,
+        bins=[-np.inf, 45, 100, 200, np.inf],
+        labels=["Monthly", "Quarterly", "Semi-Annual", "Annual"],
+        right=False
+    )
+    # A single payment has no gaps to average
+    return frequency.astype(object).where(avg_diff.notna(), "Unknown")
 
 
-def calculate_safety_score(
-    payout_ratio: float,
-    consecutive_years: int,
-    growth_rate: float,
-    dividend_yield: float
-) -> int:
+@njit(parallel=True, cache=True)
+def score_kernel(payout, years, growth, dividend_yield, out_safety, out_rank):
     """
-    Generates a 0-100 safety score based on dividend sustainability factors.
+    Safety score (0-100) and composite rank score for every stock in one pass.
+    Inputs are parallel float arrays; results are written into out_safety/out_rank.
     
-    Components:
+    Safety components:
     - Payout ratio (lower is safer, but too low might mean no commitment)
     - Consecutive years (longer track record = more reliable)
     - Growth rate (growing dividends suggest healthy business)
     - Yield (extremely high yield often signals distress)
-    """
-    score = 50  # Start at neutral
-    
-    # Payout ratio scoring (40 points max)
-    # Sweet spot is 30-60% for most companies
-    if payout_ratio == 0:
-        score += 0  # No data, neutral
-    elif payout_ratio < 30:
-        score += 25  # Very safe but maybe not committed
-    elif payout_ratio < 50:
-        score += 40  # Ideal range
-    elif payout_ratio < 70:
-        score += 30  # Still reasonable
-    elif payout_ratio < 90:
-        score += 15  # Getting stretched
-    else:
-        score -= 10  # Payout ratio over 90% is concerning
-    
-    # Consecutive years scoring (30 points max)
-    if consecutive_years >= 25:
-        score += 30  # Dividend aristocrat level
-    elif consecutive_years >= 10:
-        score += 20
-    elif consecutive_years >= 5:
-        score += 10
-    elif consecutive_years >= 2:
-        score += 5
-    
-    # Growth rate scoring (20 points max)
-    if growth_rate > 10:
-        score += 20
-    elif growth_rate > 5:
-        score += 15
-    elif growth_rate > 0:
-        score += 10
-    elif growth_rate > -5:
-        score += 0  # Flat or slight decline
-    else:
-        score -= 10  # Significant dividend cuts
-    
-    # Yield sanity check (10 point adjustment)
-    # Super high yields often precede cuts
-    # NOTE: dividend_yield is in percentage form (e.g., 5.0 = 5%)
-    if dividend_yield > 10:  # Over 10%
-        score -= 15  # Warning flag
-    elif dividend_yield > 8:  # Over 8%
-        score -= 5
     
-    return max(0, min(100, score))  # Clamp to 0-100
-
-
-def calculate_rank_score(
-    dividend_yield: float,
-    growth_rate: float,
-    safety_score: int,
-    consecutive_years: int
-) -> float:
-    """
-    Composite ranking score for auto-sorting the best dividend stocks.
-    
-    Weights:
+    Rank weights:
     - 35% Yield (income now)
     - 25% Growth rate (income tomorrow)
     - 25% Safety score (sustainability)
     - 15% Track record (consecutive years)
-    """
-    # Normalize each factor to 0-100 scale
-    # NOTE: dividend_yield is in percentage form (e.g., 5.0 = 5%)
-    yield_score = min(dividend_yield * 10, 100)  # 10% yield = 100 points
-    growth_score = min(max(growth_rate + 10, 0) * 5, 100)  # -10% to +10% mapped to 0-100
-    track_score = min(consecutive_years * 4, 100)  # 25 years = 100
-    
-    rank = (
-        yield_score * 0.35 +
-        growth_score * 0.25 +
-        safety_score * 0.25 +
-        track_score * 0.15
-    )
     
-    return rank
+    NOTE: payout and dividend_yield are in percentage form (e.g., 5.0 = 5%)
+    """
+    for i in prange(payout.shape[0]):
+        score = 50  # Start at neutral
+        
+        # Payout ratio scoring (40 points max)
+        # Sweet spot is 30-60% for most companies
+        p = payout[i]
+        if p == 0:
+            score += 0  # No data, neutral
+        elif p < 30:
+            score += 25  # Very safe but maybe not committed
+        elif p < 50:
+            score += 40  # Ideal range
+        elif p < 70:
+            score += 30  # Still reasonable
+        elif p < 90:
+            score += 15  # Getting stretched
+        else:
+            score -= 10  # Payout ratio over 90% is concerning
+        
+        # Consecutive years scoring (30 points max)
+        y = years[i]
+        if y >= 25:
+            score += 30  # Dividend aristocrat level
+        elif y >= 10:
+            score += 20
+        elif y >= 5:
+            score += 10
+        elif y >= 2:
+            score += 5
+        
+        # Growth rate scoring (20 points max)
+        g = growth[i]
+        if g > 10:
+            score += 20
+        elif g > 5:
+            score += 15
+        elif g > 0:
+            score += 10
+        elif g > -5:
+            score += 0  # Flat or slight decline
+        else:
+            score -= 10  # Significant dividend cuts
+        
+        # Yield sanity check (10 point adjustment)
+        # Super high yields often precede cuts
+        d = dividend_yield[i]
+        if d > 10:  # Over 10%
+            score -= 15  # Warning flag
+        elif d > 8:  # Over 8%
+            score -= 5
+        
+        safety = max(0, min(100, score))  # Clamp to 0-100
+        out_safety[i] = safety
+        
+        # Normalize each rank factor to 0-100 scale
+        yield_score = min(d * 10, 100.0)  # 10% yield = 100 points
+        growth_score = min(max(g + 10, 0.0) * 5, 100.0)  # -10% to +10% mapped to 0-100
+        track_score = min(y * 4, 100.0)  # 25 years = 100
+        
+        out_rank[i] = (
+            yield_score * 0.35 +
+            growth_score * 0.25 +
+            safety * 0.25 +
+            track_score * 0.15
+        )
 
 
 def categorize_stock(yield_pct: float, growth_rate: float, safety_score: int, consecutive_years: int) -> str:
@@ -437,21 +856,155 @@ def categorize_stock(yield_pct: float, growth_rate: float, safety_score: int, co
 # HISTORICAL DATA MANAGEMENT
 # ============================================================================
 
-def load_historical_data() -> Dict[str, List[Dict]]:
+def history_path(ticker: str, directory: Path = HISTORY_DIR) -> Optional[Path]:
+    """Where a ticker's trend points live on disk (None for anything that isn't a symbol)."""
+    if not TICKER_PATTERN.fullmatch(ticker):
+        return None
+    return directory / f"{ticker}.msgpack"
+
+
+def load_ticker_history(ticker: str) -> List[Dict]:
+    """Trend points for a single ticker, oldest first."""
+    if redis_client is not None:
+        try:
+            return [orjson.loads(point) for point in redis_client.lrange(f"trend:{ticker}", 0, -1)]
+        except redis.RedisError as e:
+            logger.error(f"Failed to load trend history from Redis for {ticker}: {e}")
+            return []
+    
+    path = history_path(ticker)
+    if path is None or not path.exists():
+        return []
+    
+    # The file is a log of packed points; older files hold a single packed list
+    points = []
+    with open(path, "rb") as f:
+        for item in msgpack.Unpacker(f):
+            if isinstance(item, list):
+                points.extend(item)
+            else:
+                points.append(item)
+    return points[-HISTORY_LIMIT:]
+
+
+def append_ticker_history(ticker: str, point: Dict):
+    """
+    Appends one trend point to the ticker's log - no read, no rewrite.
+    Once the log outgrows HISTORY_COMPACT_BYTES it's trimmed back to HISTORY_LIMIT.
+    """
+    path = history_path(ticker)
+    if path is None:
+        return
+    
+    with open(path, "ab") as f:
+        f.write(msgpack.packb(point))
+        size = f.tell()
+    
+    if size > HISTORY_COMPACT_BYTES:
+        save_ticker_history(ticker, load_ticker_history(ticker))
+
+
+def save_ticker_history(ticker: str, points: List[Dict], directory: Path = HISTORY_DIR):
+    """Rewrites one ticker's log with exactly these points - other tickers' files are untouched."""
+    path = history_path(ticker, directory)
+    if path is None:
+        return
+    
+    # Write-then-rename so a crash mid-compaction can't lose the history
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        for point in points:
+            f.write(msgpack.packb(point))
+    os.replace(tmp_path, path)
+
+
+def migrate_legacy_history():
+    """
+    Moves the old single historical_dividends.json into the current trend
+    storage - per-ticker files, or the trend:{ticker} lists when REDIS_URL is set.
+    Runs once per backend, and is safe with several processes starting at once.
+    """
+    if redis_client is not None:
+        migrate_legacy_history_redis()
+        return
+    
+    if HISTORY_DIR.exists():
+        return
+    if not HISTORICAL_FILE.exists():
+        HISTORY_DIR.mkdir(parents=True, exist_ok=True)
+        return
+    
+    with open(HISTORICAL_FILE, "rb") as f:
+        historical = orjson.loads(f.read())
+    
+    # Build the whole directory under a private name and rename it into place
+    # at the end - a half-finished migration never looks like a finished one
+    tmp_dir = Path(tempfile.mkdtemp(prefix="history.tmp-", dir=DATA_DIR))
+    try:
+        for ticker, points in historical.items():
+            save_ticker_history(ticker, points[-HISTORY_LIMIT:], tmp_dir)
+        os.rename(tmp_dir, HISTORY_DIR)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if HISTORY_DIR.exists():
+            return  # Another process got there first
+        raise
+    logger.info(f"Migrated trend history for {len(historical)} tickers to {HISTORY_DIR}")
+
+
+def migrate_legacy_history_redis():
     """
-    Loads previously saved dividend snapshots for trend comparison.
-    Structure: {ticker: [{date, metrics...}, ...]}
+    Redis flavour of migrate_legacy_history. The legacy points go in front of
+    any trend points already recorded, all in one MULTI/EXEC together with the
+    history:migrated marker - WATCHing the marker keeps concurrent starts from
+    copying twice.
     """
-    if HISTORICAL_FILE.exists():
-        with open(HISTORICAL_FILE, "r") as f:
-            return json.load(f)
-    return {}
+    if not HISTORICAL_FILE.exists():
+        return
+    
+    try:
+        with redis_client.pipeline(transaction=True) as pipe:
+            pipe.watch("history:migrated")
+            if pipe.exists("history:migrated"):
+                return
+            
+            with open(HISTORICAL_FILE, "rb") as f:
+                historical = orjson.loads(f.read())
+            
+            pipe.multi()
+            for ticker, points in historical.items():
+                recent = points[-HISTORY_LIMIT:]
+                if recent:
+                    # LPUSH prepends one at a time, so push newest first
+                    pipe.lpush(f"trend:{ticker}", *(orjson.dumps(point) for point in reversed(recent)))
+                    pipe.ltrim(f"trend:{ticker}", -HISTORY_LIMIT, -1)
+            pipe.set("history:migrated", datetime.now().isoformat())
+            pipe.execute()
+        logger.info(f"Migrated trend history for {len(historical)} tickers to Redis")
+    except redis.WatchError:
+        pass  # Another process migrated in the meantime
+    except redis.RedisError as e:
+        logger.error(f"Failed to migrate trend history to Redis, will retry on next start: {e}")
+
+
+migrate_legacy_history()
 
 
-def save_historical_data(data: Dict[str, List[Dict]]):
-    """Persists historical data to disk."""
-    with open(HISTORICAL_FILE, "w") as f:
-        json.dump(data, f)
+async def run_storage(func, *args):
+    """Runs a blocking snapshot/history call on the storage threads, off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(storage_executor, func, *args)
+
+
+def make_trend_point(stock: Dict, day: str) -> Dict:
+    """The slice of a stock we keep for trend analysis."""
+    return {
+        "date": day,
+        "yield": stock["dividendYield"],
+        "price": stock["price"],
+        "growthRate": stock["growthRate"],
+        "safetyScore": stock["safetyScore"]
+    }
 
 
 def save_snapshot(stocks: List[Dict]):
@@ -459,36 +1012,62 @@ def save_snapshot(stocks: List[Dict]):
     Saves current fetch as a snapshot for quick loading.
     Also appends to historical data for trend analysis.
     """
-    # Save latest snapshot
+    fetched_at = datetime.now().isoformat()
+    today = datetime.now().strftime("%Y-%m-%d")
+    fill_sort_fields(stocks)
+
+    if redis_client is not None:
+        try:
+            save_snapshot_redis(stocks, fetched_at, today)
+            return
+        except redis.RedisError as e:
+            # Don't throw a whole refresh away - keep it on disk instead
+            logger.error(f"Failed to save snapshot to Redis, writing {SNAPSHOT_FILE} instead: {e}")
+
+    # Save latest snapshot (with lookup indexes so queries skip full scans)
     snapshot = {
-        "fetchedAt": datetime.now().isoformat(),
-        "stocks": stocks
+        "fetchedAt": fetched_at,
+        "stocks": stocks,
+        "indexes": build_snapshot_indexes(stocks)
     }
-    with open(SNAPSHOT_FILE, "w") as f:
-        json.dump(snapshot, f)
+    # Write-then-rename so a reader never parses (and caches) a half-written file
+    tmp_file = SNAPSHOT_FILE.with_suffix(".json.tmp")
+    with open(tmp_file, "wb") as f:
+        f.write(orjson.dumps(snapshot, option=orjson.OPT_SERIALIZE_NUMPY))
+    os.replace(tmp_file, SNAPSHOT_FILE)
     
-    # Append to historical (keep last 30 days of daily snapshots)
-    historical = load_historical_data()
-    today = datetime.now().strftime("%Y-%m-%d")
+    # Append to historical (readers see the last 30 snapshots per ticker).
+    # No history directory means trends live in Redis and this is the fallback.
+    if HISTORY_DIR.exists():
+        for stock in stocks:
+            append_ticker_history(stock["ticker"], make_trend_point(stock, today))
+
+
+def save_snapshot_redis(stocks: List[Dict], fetched_at: str, today: str):
+    """
+    Redis flavour of save_snapshot - one pipelined MULTI/EXEC, no full rewrite.
+
+    Layout:
+    - stock:{ticker}   JSON blob
+    - stocks:by_rank   sorted set of tickers scored by rankScore
+    - stocks:fetchedAt timestamp of this snapshot
+    - trend:{ticker}   list of trend points, capped at HISTORY_LIMIT
+    
+    Nothing expires - like the snapshot file, the data stays until the next
+    refresh replaces it (the frontend decides when it's too old).
+    """
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.delete("stocks:by_rank")  # Drop tickers that fell out of this fetch
     
     for stock in stocks:
         ticker = stock["ticker"]
-        if ticker not in historical:
-            historical[ticker] = []
-        
-        # Add today's data point
-        historical[ticker].append({
-            "date": today,
-            "yield": stock["dividendYield"],
-            "price": stock["price"],
-            "growthRate": stock["growthRate"],
-            "safetyScore": stock["safetyScore"]
-        })
-        
-        # Keep only last 30 snapshots per ticker
-        historical[ticker] = historical[ticker][-30:]
+        pipe.set(f"stock:{ticker}", orjson.dumps(stock, option=orjson.OPT_SERIALIZE_NUMPY))
+        pipe.zadd("stocks:by_rank", {ticker: stock["rankScore"]})
+        pipe.rpush(f"trend:{ticker}", orjson.dumps(make_trend_point(stock, today)))
+        pipe.ltrim(f"trend:{ticker}", -HISTORY_LIMIT, -1)
     
-    save_historical_data(historical)
+    pipe.set("stocks:fetchedAt", fetched_at)
+    pipe.execute()
 
 
 def load_cached_snapshot() -> Optional[Dict]:
@@ -496,30 +1075,236 @@ def load_cached_snapshot() -> Optional[Dict]:
     Returns cached snapshot if it exists.
     Always returns data if available - never return None when data exists.
     The frontend can decide whether to show "update available" based on age.
+    
+    Parsed once per snapshot version and kept in memory - callers get the
+    shared dict, so treat it as read-only.
     """
-    if not SNAPSHOT_FILE.exists():
+    if redis_client is not None:
+        snapshot = load_snapshot_redis()
+        if snapshot is not None:
+            return snapshot
+        # Redis empty or unreachable - use a snapshot save_snapshot fell back to
+
+    try:
+        stat = SNAPSHOT_FILE.stat()
+    except FileNotFoundError:
         return None
     
+    version = (stat.st_mtime_ns, stat.st_size)
+    if snapshot_cache["version"] == version:
+        return snapshot_cache["data"]
+    
     try:
-        with open(SNAPSHOT_FILE, "r") as f:
-            snapshot = json.load(f)
+        # Parse straight out of the page cache - no intermediate bytes copy
+        with open(SNAPSHOT_FILE, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                snapshot = orjson.loads(view)
         
         # Always return cached data if it exists - never discard valid data
         # The 7-day check is for triggering refresh prompts, not for discarding data
-        return snapshot
-    except (json.JSONDecodeError, IOError) as e:
+        snapshot_cache["data"] = prepare_snapshot(snapshot)
+        snapshot_cache["version"] = version
+        return snapshot_cache["data"]
+    except (orjson.JSONDecodeError, ValueError, IOError) as e:  # ValueError: empty file can't be mapped
         logger.error(f"Failed to load cached snapshot: {e}")
         return None
 
 
+def load_snapshot_redis() -> Optional[Dict]:
+    """Rebuilds the snapshot dict from Redis, stocks already in rank order."""
+    try:
+        # Every save sets a new fetchedAt - same stamp means same snapshot
+        version = redis_client.get("stocks:fetchedAt")
+        if version is not None and snapshot_cache["version"] == version:
+            return snapshot_cache["data"]
+        
+        tickers = redis_client.zrevrange("stocks:by_rank", 0, -1)
+        if not tickers:
+            return None
+        
+        payloads = redis_client.mget([f"stock:{ticker}" for ticker in tickers])
+        stocks = [orjson.loads(p) for p in payloads if p is not None]
+        if not stocks:
+            return None
+        
+        # Indexes aren't stored in Redis, so build them on read
+        snapshot = prepare_snapshot({
+            "fetchedAt": version,
+            "stocks": stocks
+        })
+        if version is not None:
+            snapshot_cache["data"] = snapshot
+            snapshot_cache["version"] = version
+        return snapshot
+    except redis.RedisError as e:
+        logger.error(f"Failed to load cached snapshot from Redis: {e}")
+        return None
+
+
+# ============================================================================
+# SNAPSHOT INDEXES
+# ============================================================================
+# Alongside the stock dicts, each loaded snapshot carries a column-oriented
+# frame of the scalar fields (filters become vectorized masks) and a
+# presorted order per sort field (no sort per request).
+
+def prepare_snapshot(snapshot: Dict) -> Dict:
+    """Attaches the query structures to a freshly loaded snapshot."""
+    # Snapshots written before indexes existed get them built on load
+    if "indexes" not in snapshot:
+        fill_sort_fields(snapshot["stocks"])
+        snapshot["indexes"] = build_snapshot_indexes(snapshot["stocks"])
+    snapshot["frame"] = build_stock_frame(snapshot["stocks"])
+    return snapshot
+
+
+def build_stock_frame(stocks: List[Dict]) -> pd.DataFrame:
+    """
+    Every scalar field as a column, one row per stock (same positions as `stocks`).
+    dividendHistory stays in the dicts - it's only needed for output.
+    """
+    frame = pd.DataFrame.from_records(stocks, exclude=["dividendHistory"]) if stocks else pd.DataFrame(
+        columns=["sector", "category", "dividendYield", "safetyScore"]
+    )
+    frame["sectorKey"] = frame["sector"].str.lower()
+    return frame
+
+
+def build_snapshot_indexes(stocks: List[Dict]) -> Dict[str, Any]:
+    """
+    Precomputed sort orders, stored as positions into `stocks` so they
+    serialize alongside the snapshot.
+
+    - sortedBy: field -> positions in display order
+    """
+    return {
+        "sortedBy": {
+            field: sort_positions(stocks, field)
+            for field in SORTABLE_FIELDS
+        }
+    }
+
+
+def fill_sort_fields(stocks: List[Dict]):
+    """
+    Normalizes the sort fields in place so every order can be built with
+    plain itemgetter keys: missing/None becomes 0 ("" for text), and numeric
+    fields holding anything that isn't a finite number - yfinance can hand
+    back trailingPE as the string "Infinity" - become a number or 0.
+    """
+    for stock in stocks:
+        for field in SORTABLE_FIELDS:
+            value = stock.get(field)
+            if field in TEXT_SORT_FIELDS:
+                if not isinstance(value, str):
+                    stock[field] = "" if value is None else str(value)
+            elif not isinstance(value, numbers.Real) or not math.isfinite(value):
+                stock[field] = to_finite_number(value)
+
+
+def to_finite_number(value: Any) -> float:
+    """A sortable number for a messy value: numeric strings parse, anything else is 0."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return 0
+    return number if math.isfinite(number) else 0
+
+
+def sort_positions(stocks: List[Dict], field: str) -> List[int]:
+    """Positions of `stocks` in display order for `field` (stable, like list.sort)."""
+    reverse = field not in TEXT_SORT_FIELDS
+    sorter = _SORTERS.get(field)
+    if sorter is None:
+        # Not a known field - keep the forgiving lookup
+        return sorted(range(len(stocks)), key=lambda i: stocks[i].get(field, 0) or 0, reverse=reverse)
+    keys = list(map(sorter, stocks))
+    return sorted(range(len(stocks)), key=keys.__getitem__, reverse=reverse)
+
+
+# ============================================================================
+# DETAIL REQUEST BATCHING
+# ============================================================================
+# Single-stock lookups arrive one ticker at a time. Rather than one upstream
+# call each, they're collected for DETAIL_BATCH_WAIT and fetched together.
+
+def request_detail(ticker: str) -> asyncio.Future:
+    """
+    Queues a ticker for the next detail batch.
+    The returned future resolves to its metrics dict, or None if it has no dividend data.
+    """
+    global detail_queue, detail_flusher
+    
+    # Start the flusher lazily (and again if its event loop went away)
+    if detail_flusher is None or detail_flusher.done():
+        detail_queue = asyncio.Queue()
+        detail_flusher = asyncio.create_task(batch_flusher())
+    
+    future = asyncio.get_running_loop().create_future()
+    detail_queue.put_nowait((ticker, future))
+    return future
+
+
+async def batch_flusher():
+    """
+    Background loop: waits for a first request, keeps collecting until the
+    batch is full or DETAIL_BATCH_WAIT has passed, then hands it off.
+    """
+    loop = asyncio.get_running_loop()
+    
+    while True:
+        batch = [await detail_queue.get()]
+        deadline = loop.time() + DETAIL_BATCH_WAIT
+        
+        while len(batch) < BATCH_SIZE:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(detail_queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        
+        # Fetch in its own task so the next window starts collecting right away
+        task = asyncio.create_task(flush_detail_batch(batch))
+        detail_batches.add(task)
+        task.add_done_callback(detail_batches.discard)
+
+
+async def flush_detail_batch(batch: List[Tuple[str, asyncio.Future]]):
+    """Fetches one collected batch and resolves every waiting future."""
+    tickers = list(dict.fromkeys(ticker for ticker, _ in batch))
+    
+    try:
+        # Detail view shows live price/yield - don't serve it from the info cache
+        results = await calculate_batch_metrics(tickers, use_cache=False)
+    except Exception as e:
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(e)
+        return
+    
+    by_ticker = {stock["ticker"]: stock for stock in results}
+    for ticker, future in batch:
+        if not future.done():
+            future.set_result(by_ticker.get(ticker))
+
+
 # ============================================================================
 # API ENDPOINTS
 # ============================================================================
 
+@app.on_event("shutdown")
+async def shutdown_http_client():
+    """Release the pooled Yahoo connections and the compute workers."""
+    await close_http_client()
+    close_compute_pool()
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "ok", "service": "Dividend Hunter API"}
+    return {"status": "ok", "service": "Dividend Hunter API", "stats": detail_stats}
 
 
 @app.get("/api/stocks")
@@ -532,7 +1317,8 @@ async def get_dividend_stocks(
     min_safety: Optional[int] = Query(None, description="Minimum safety score 0-100"),
     sector: Optional[str] = Query(None, description="Filter by sector"),
     sort_by: str = Query("rankScore", description="Sort field"),
-    limit: int = Query(100, description="Max results to return")
+    limit: int = Query(100, description="Max results to return"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. ticker,dividendYield,rankScore")
 ):
     """
     Main endpoint - returns ranked dividend stocks.
@@ -542,7 +1328,7 @@ async def get_dividend_stocks(
     """
     
     # Check cache first
-    cached = load_cached_snapshot()
+    cached = await run_storage(load_cached_snapshot)
     
     # If no cache exists at all
     if not cached:
@@ -569,13 +1355,13 @@ async def get_dividend_stocks(
     # If we have cached data
     if cached and not force_refresh:
         # Return cached data immediately
-        return apply_filters_and_sort(cached["stocks"], category, min_yield, max_yield, min_safety, sector, sort_by, limit)
+        return stream_stock_list(apply_filters_and_sort(cached["stocks"], category, min_yield, max_yield, min_safety, sector, sort_by, limit, cached["indexes"], cached["frame"], fields))
          
     # Force refresh requested with existing cache
     if force_refresh:
         logger.info("Force refresh requested. Triggering background refresh.")
         background_tasks.add_task(refresh_data_background)
-        return apply_filters_and_sort(cached["stocks"], category, min_yield, max_yield, min_safety, sector, sort_by, limit)
+        return stream_stock_list(apply_filters_and_sort(cached["stocks"], category, min_yield, max_yield, min_safety, sector, sort_by, limit, cached["indexes"], cached["frame"], fields))
         
 
 async def refresh_data_background(return_data: bool = False, **filter_args):
@@ -585,12 +1371,10 @@ async def refresh_data_background(return_data: bool = False, **filter_args):
     """
     logger.info("Starting data refresh...")
     
-    loop = asyncio.get_running_loop()
-    
     # Fetch in batches to avoid overwhelming yfinance
     all_stocks = []
-    # REDUCED BATCH SIZE to 20 to prevent rate limiting issues
-    batch_size = 20 
+    # Each batch's requests go out concurrently
+    batch_size = BATCH_SIZE
     
     total_batches = (len(SP500_TICKERS) + batch_size - 1) // batch_size
     
@@ -600,12 +1384,7 @@ async def refresh_data_background(return_data: bool = False, **filter_args):
         
         logger.info(f"Processing batch {current_batch}/{total_batches} ({len(batch)} tickers)...")
         
-        futures = [
-            loop.run_in_executor(executor, calculate_dividend_metrics, ticker)
-            for ticker in batch
-        ]
-        results = await asyncio.gather(*futures)
-        valid_results = [r for r in results if r is not None]
+        valid_results = await calculate_batch_metrics(batch)
         all_stocks.extend(valid_results)
         
         # SLEEP to respect rate limits
@@ -615,7 +1394,7 @@ async def refresh_data_background(return_data: bool = False, **filter_args):
     
     # Save snapshot for caching and historical tracking
     if all_stocks:
-        save_snapshot(all_stocks)
+        await run_storage(save_snapshot, all_stocks)
         logger.info(f"Refresh complete. Fetched {len(all_stocks)} dividend-paying stocks")
     else:
         logger.warning("Refresh complete but found 0 stocks. Keeping old cache if exists.")
@@ -633,54 +1412,103 @@ def apply_filters_and_sort(
     min_safety: Optional[int],
     sector: Optional[str],
     sort_by: str,
-    limit: int
+    limit: int,
+    indexes: Optional[Dict[str, Any]] = None,
+    frame: Optional[pd.DataFrame] = None,
+    fields: Optional[str] = None
 ) -> Dict:
-    """Helper to apply filters and sorting to stock list."""
-    filtered = stocks
+    """
+    Helper to apply filters and sorting to stock list.
+    Uses the snapshot's frame and sort orders; builds them on the fly if not given.
+    `fields` (comma-separated) trims each returned stock to just those keys.
+    """
+    if indexes is None:
+        indexes = build_snapshot_indexes(stocks)
+    if frame is None:
+        frame = build_stock_frame(stocks)
+    
+    # One boolean mask over the columns instead of a list pass per filter
+    mask = np.ones(len(stocks), dtype=bool)
     
     if category:
-        filtered = [s for s in filtered if s["category"] == category]
+        mask &= (frame["category"] == category).to_numpy()
     
     if min_yield is not None:
-        filtered = [s for s in filtered if s["dividendYield"] >= min_yield]
+        mask &= (frame["dividendYield"] >= min_yield).to_numpy()
     
     if max_yield is not None:
-        filtered = [s for s in filtered if s["dividendYield"] <= max_yield]
+        mask &= (frame["dividendYield"] <= max_yield).to_numpy()
     
     if min_safety is not None:
-        filtered = [s for s in filtered if s["safetyScore"] >= min_safety]
+        mask &= (frame["safetyScore"] >= min_safety).to_numpy()
     
     if sector:
-        filtered = [s for s in filtered if s["sector"].lower() == sector.lower()]
+        mask &= (frame["sectorKey"] == sector.lower()).to_numpy()
     
-    # Sort (descending by default for most metrics)
-    reverse = sort_by not in ["ticker", "name"]
-    filtered.sort(key=lambda x: x.get(sort_by, 0) or 0, reverse=reverse)
+    # Sort (descending by default for most metrics) - presorted, so just
+    # keep the positions that passed the filters, in order
+    order = indexes["sortedBy"].get(sort_by)
+    if order is None:
+        order = sort_positions(stocks, sort_by)
+    order = np.asarray(order, dtype=np.intp)
+    hits = order[mask[order]]
+    page = [stocks[i] for i in hits[:limit]]
+    
+    if fields:
+        # List views rarely need dividendHistory, which is most of the payload
+        keep = [f.strip() for f in fields.split(",") if f.strip()]
+        page = [{k: s[k] for k in keep if k in s} for s in page]
     
     return {
-        "stocks": filtered[:limit],
-        "total": len(filtered),
+        "stocks": page,
+        "total": int(mask.sum()),
         "fetchedAt": datetime.now().isoformat()
     }
 
 
+def stream_stock_list(result: Dict) -> StreamingResponse:
+    """
+    Sends an apply_filters_and_sort() result as the same JSON object, but
+    serialized one stock at a time - the first cards go out before the whole
+    list is encoded, and no full response body is ever held in memory.
+    """
+    async def body():
+        yield b'{"stocks":['
+        for i, stock in enumerate(result["stocks"]):
+            yield (b"," if i else b"") + orjson.dumps(stock, option=orjson.OPT_SERIALIZE_NUMPY)
+        yield b'],"total":' + orjson.dumps(result["total"]) + b',"fetchedAt":' + orjson.dumps(result["fetchedAt"]) + b"}"
+    
+    return StreamingResponse(body(), media_type="application/json")
+
+
 @app.get("/api/stock/{ticker}")
 async def get_stock_detail(ticker: str):
     """
     Get detailed data for a single stock.
-    Always fetches fresh for detail view.
+    Always fetches fresh for detail view - the info tier cache is bypassed,
+    concurrent requests for the same ticker just share one fetch.
     """
     ticker = ticker.upper()
     
-    loop = asyncio.get_event_loop()
-    data = await loop.run_in_executor(executor, calculate_dividend_metrics, ticker)
+    # Join an in-flight fetch for this ticker if there is one.
+    # No lock needed - nothing awaits between the lookup and the insert.
+    future = inflight_details.get(ticker)
+    if future is None:
+        future = request_detail(ticker)
+        inflight_details[ticker] = future
+        future.add_done_callback(lambda _: inflight_details.pop(ticker, None))
+    else:
+        detail_stats["cached_dedupe"] += 1
+    
+    # Shield so one client disconnecting doesn't cancel the fetch for the rest
+    data = await asyncio.shield(future)
     
     if not data:
         raise HTTPException(status_code=404, detail=f"No dividend data found for {ticker}")
     
-    # Add historical trend data
-    historical = load_historical_data()
-    data["historicalTrend"] = historical.get(ticker, [])
+    # Add historical trend data (copy - the fetched dict is shared between callers)
+    data = dict(data)
+    data["historicalTrend"] = await run_storage(load_ticker_history, ticker)
     
     return data
 
@@ -692,26 +1520,26 @@ async def get_stock_trends(ticker: str):
     Used for the trend analysis charts.
     """
     ticker = ticker.upper()
-    historical = load_historical_data()
+    trends = await run_storage(load_ticker_history, ticker)
     
-    if ticker not in historical:
+    if not trends:
         raise HTTPException(status_code=404, detail=f"No historical data for {ticker}")
     
     return {
         "ticker": ticker,
-        "trends": historical[ticker]
+        "trends": trends
     }
 
 
 @app.get("/api/sectors")
 async def get_sectors():
     """Returns list of available sectors for filtering."""
-    cached = load_cached_snapshot()
+    cached = await run_storage(load_cached_snapshot)
     if not cached:
         return {"sectors": []}
     
-    sectors = list(set(s["sector"] for s in cached["stocks"] if s.get("sector")))
-    sectors.sort()
+    sectors = cached["frame"]["sector"]
+    sectors = sorted(sectors[sectors.notna() & (sectors != "")].unique().tolist())
     
     return {"sectors": sectors}
 
@@ -725,24 +1553,20 @@ async def get_top_stocks(
     Quick endpoint for the best dividend stocks right now.
     Auto-checks and returns the current top performers by rank score.
     """
-    cached = load_cached_snapshot()
+    cached = await run_storage(load_cached_snapshot)
     stocks = cached["stocks"] if cached else []
     
     if not stocks:
         # Force a fresh fetch if no cache
         return await get_dividend_stocks(force_refresh=True, category=category, limit=count)
     
-    if category:
-        print(f"DEBUG: Filtering for category '{category}'")
-        # Check distinct categories in data
-        distinct_cats = set(s.get("category") for s in stocks)
-        print(f"DEBUG: Available categories: {distinct_cats}")
-        stocks = [s for s in stocks if s["category"] == category]
-    
-    stocks.sort(key=lambda x: x["rankScore"], reverse=True)
+    top = apply_filters_and_sort(
+        stocks, category, None, None, None, None, "rankScore", count,
+        cached["indexes"], cached["frame"]
+    )
     
     return {
-        "stocks": stocks[:count],
+        "stocks": top["stocks"],
         "fetchedAt": cached["fetchedAt"] if cached else datetime.now().isoformat()
     }
 
@@ -3,7 +3,7 @@ import asyncio
 import logging
 import time
 from pathlib import Path
-from main import calculate_dividend_metrics, save_snapshot, SP500_TICKERS, executor
+from main import calculate_batch_metrics, close_http_client, close_compute_pool, save_snapshot, SP500_TICKERS, BATCH_SIZE
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -11,9 +11,8 @@ logger = logging.getLogger(__name__)
 async def seed_data():
     logger.info(f"Starting full seed data fetch for {len(SP500_TICKERS)} stocks...")
     
-    loop = asyncio.get_running_loop()
     all_stocks = []
-    batch_size = 20 # Smaller batch size to be safer with rate limits
+    batch_size = BATCH_SIZE # Each batch's requests go out concurrently
     
     total_batches = (len(SP500_TICKERS) + batch_size - 1) // batch_size
     
@@ -22,17 +21,15 @@ async def seed_data():
         current_batch = i // batch_size + 1
         logger.info(f"Processing batch {current_batch}/{total_batches} ({len(batch)} tickers)...")
         
-        futures = [
-            loop.run_in_executor(executor, calculate_dividend_metrics, ticker)
-            for ticker in batch
-        ]
-        results = await asyncio.gather(*futures)
-        valid_results = [r for r in results if r is not None]
+        valid_results = await calculate_batch_metrics(batch)
         all_stocks.extend(valid_results)
         
         logger.info(f"Batch {current_batch} complete. Found {len(valid_results)} dividend payers. Sleeping to respect rate limits...")
         await asyncio.sleep(2) # Sleep 2 seconds between batches
 
+    await close_http_client()
+    close_compute_pool()
+
     # Save the snapshot
     if all_stocks:
         logger.info(f"Saving snapshot with {len(all_stocks)} stocks...")